@@ -1,8 +1,17 @@
+import os
 import time
 import re
+import sys
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import shelve
+import dbm.dumb
 import requests
 import pandas as pd
 from tqdm import tqdm  # pip install tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
 from urllib.parse import quote
 from datetime import datetime
 import urllib.parse
@@ -28,6 +37,18 @@ MAX_ACCEPTED = 9999
 CROSSREF_ROWS_PER_QUERY = 5
 MAILTO = "email@domain.com"  # Your email address
 
+# Crossref throttling: used until Crossref reports its own limit via the
+# X-Rate-Limit-Limit / X-Rate-Limit-Interval response headers
+CROSSREF_RATE_LIMIT = 5          # requests ...
+CROSSREF_RATE_INTERVAL = 1.0     # ... per this many seconds
+CROSSREF_CONCURRENCY = 3         # DiVA title groups matched in parallel (polite pool allows 3)
+
+# Local cache of Crossref responses, reused across runs
+USE_CROSSREF_CACHE = True        # set False to always ask Crossref
+CROSSREF_CACHE_REFRESH = False   # True: ignore cached entries but store fresh ones
+CROSSREF_CACHE_FILE = "crossref_cache"
+CROSSREF_CACHE_MAX_AGE_DAYS = 30
+
 # Verification toggles
 VERIFY_USE_VOLUME = True
 VERIFY_USE_ISSUE = True
@@ -43,27 +64,160 @@ USE_PROPRIETARY_SCOPUS = True
 WOS_API_KEY = "*****"  # put your Clarivate Web of Science Starter API key here
 WOS_BASE_URL = "https://api.clarivate.com/apis/wos-starter/v1/documents"
 WOS_LOOKUP_FROM_VERIFIED_DOI = USE_PROPRIETARY_WOS  # derived from feature flag
+WOS_RATE_LIMIT = 1  # calls per second; Starter API free trial allows 1, institutional plans 5
 
 # Scopus Search API (optional, controlled by feature flag)
 SCOPUS_API_KEY = "*****"  # Elsevier / Scopus API key
 SCOPUS_BASE_URL = "https://api.elsevier.com/content/search/scopus"
 SCOPUS_LOOKUP_FROM_VERIFIED_DOI = USE_PROPRIETARY_SCOPUS  # derived from feature flag
+SCOPUS_RATE_LIMIT = 9  # calls per second (Scopus Search API throttle)
 
 # PubMed (NCBI E-utilities)
 NCBI_TOOL = "kolleKTHor"
 NCBI_EMAIL = "email@domain.com"  # Your email address
 PUBMED_LOOKUP_FROM_VERIFIED_DOI = True
+PUBMED_RATE_LIMIT = 3  # calls per second (NCBI limit without an API key)
+
+# Output: False shows progress and errors only, True adds per-row matching details
+VERBOSE = False
 
 # Filenames: portal + year range (+ timestamp for outputs)
 TIMESTAMP = datetime.now().strftime("%Y%m%d-%H%M%S")
 PREFIX = f"{DIVA_PORTAL}_{FROM_YEAR}-{TO_YEAR}"
 
 DOWNLOADED_CSV = f"{PREFIX}_diva_raw.csv"                     # input snapshot
+DIVA_CSV_MAX_AGE_HOURS = 24   # reuse a snapshot younger than this instead of downloading
+FORCE_DIVA_DOWNLOAD = False   # True: always download a fresh snapshot
 OUTPUT_CSV = f"{PREFIX}_doi_candidates_{TIMESTAMP}.csv"       # output with timestamp
 EXCEL_OUT = f"{PREFIX}_doi_candidates_links_{TIMESTAMP}.xlsx" # output with timestamp
 
+log = logging.getLogger("kolleKTHor")
+
+# -------------------- HTTP --------------------
+
+# One session for all Crossref and DiVA calls, so TCP+TLS connections are reused.
+# The User-Agent carries MAILTO (if set), which puts us in Crossref's "polite" pool.
+_ua_contact = "https://github.com/awandahl/kolleKTHor"
+if MAILTO:
+    _ua_contact += f"; mailto:{MAILTO}"
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": f"kolleKTHor/1.0 ({_ua_contact})"})
+_adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=32)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+class RateLimiter:
+    """
+    Spread requests evenly so that at most `limit` are sent per `interval`
+    seconds. Call wait() right before each request; safe to share between threads.
+    """
+
+    def __init__(self, limit: int, interval: float):
+        self.limit = limit
+        self.interval = interval
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        # reserve the next slot under the lock, sleep outside it so other
+        # threads can reserve later slots or update the limit meanwhile
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval / self.limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def update_from_headers(self, headers):
+        """
+        Adopt the limit advertised by Crossref, e.g.
+        X-Rate-Limit-Limit: 50 and X-Rate-Limit-Interval: 1s.
+        """
+        try:
+            limit = int(headers.get("X-Rate-Limit-Limit", ""))
+            interval = float(headers.get("X-Rate-Limit-Interval", "").rstrip("s"))
+        except ValueError:
+            return
+        if limit > 0 and interval > 0:
+            with self._lock:
+                self.limit = limit
+                self.interval = interval
+
+CROSSREF_LIMITER = RateLimiter(CROSSREF_RATE_LIMIT, CROSSREF_RATE_INTERVAL)
+# One limiter per enrichment API, so their calls can overlap with each other
+WOS_LIMITER = RateLimiter(WOS_RATE_LIMIT, 1.0)
+SCOPUS_LIMITER = RateLimiter(SCOPUS_RATE_LIMIT, 1.0)
+PUBMED_LIMITER = RateLimiter(PUBMED_RATE_LIMIT, 1.0)
+
+# ---- Crossref response cache (shelve file) ----
+
+_crossref_cache = None
+_crossref_cache_lock = threading.Lock()  # shelve is not thread-safe
+
+def open_crossref_cache():
+    """
+    Open the cache file once; main() does this before the worker threads start.
+    dbm.dumb is pinned because the default backend on Python 3.13+ (sqlite3)
+    only works in the thread that opened it.
+    """
+    global _crossref_cache
+    with _crossref_cache_lock:
+        if _crossref_cache is None:
+            _crossref_cache = shelve.Shelf(dbm.dumb.open(CROSSREF_CACHE_FILE, "c"))
+            atexit.register(_crossref_cache.close)
+    return _crossref_cache
+
+def cache_get(key: str):
+    """
+    Return the cached value for key, or None if caching is off or refreshing,
+    the key is unknown or the entry is older than CROSSREF_CACHE_MAX_AGE_DAYS.
+    """
+    if not USE_CROSSREF_CACHE or CROSSREF_CACHE_REFRESH:
+        return None
+    cache = open_crossref_cache()
+    with _crossref_cache_lock:
+        entry = cache.get(key)
+    if entry is None:
+        return None
+    stored_at, value = entry
+    if time.time() - stored_at > CROSSREF_CACHE_MAX_AGE_DAYS * 86400:
+        return None
+    return value
+
+def cache_put(key: str, value):
+    if USE_CROSSREF_CACHE:
+        cache = open_crossref_cache()
+        with _crossref_cache_lock:
+            cache[key] = (time.time(), value)
+
+def crossref_get(url: str, params: dict):
+    CROSSREF_LIMITER.wait()
+    r = SESSION.get(url, params=params, timeout=20)
+    CROSSREF_LIMITER.update_from_headers(r.headers)
+    r.raise_for_status()
+    return r.json()
+
 # -------------------- HELPERS --------------------
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+# One DiVA author per ';'-separated part: the name up to its [id] or ' (affiliation)'
+_AUTHOR_RE = re.compile(r"(?:^|;)\s*([^;\[]*?)\s*(?=\[|\s\(|;|$)")
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+class _NonPrintableTable(dict):
+    """
+    str.translate table that deletes every non-printable character.
+    Filled lazily: each code point is classified once, on first sight.
+    """
+
+    def __missing__(self, cp: int):
+        value = cp if chr(cp).isprintable() else None
+        self[cp] = value
+        return value
+
+_NONPRINT_TABLE = _NonPrintableTable()
+
 def build_diva_url(from_year: int, to_year: int) -> str:
     aq = f'[[{{"dateIssued":{{"from":"{from_year}","to":"{to_year}"}}}}]]'
     aq2 = (
@@ -91,7 +245,7 @@ def build_diva_url(from_year: int, to_year: int) -> str:
     return DIVA_BASE + "?" + "&".join(encoded)
 
 def download_diva_csv(url: str, out_path: str):
-    print(f"Downloading DiVA CSV from {url}")
+    log.info("Downloading DiVA CSV from %s", url)
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (X11; Linux x86_64) "
@@ -99,30 +253,51 @@ def download_diva_csv(url: str, out_path: str):
             "Chrome/122.0 Safari/537.36"
         )
     }
-    r = requests.get(url, headers=headers, timeout=60)
-    r.raise_for_status()
-    with open(out_path, "wb") as f:
-        f.write(r.content)
-    print(f"Saved DiVA CSV to {out_path}")
+    # stream to disk instead of holding the whole export in memory; write to a
+    # temporary name first so an aborted download is never mistaken for a snapshot
+    part_path = out_path + ".part"
+    with SESSION.get(url, headers=headers, timeout=60, stream=True) as r:
+        r.raise_for_status()
+        with open(part_path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+    os.replace(part_path, out_path)
+    log.info("Saved DiVA CSV to %s", out_path)
+
+def diva_csv_is_fresh(path: str) -> bool:
+    if FORCE_DIVA_DOWNLOAD or not os.path.exists(path):
+        return False
+    return time.time() - os.path.getmtime(path) < DIVA_CSV_MAX_AGE_HOURS * 3600
 
 def clean_text(s: str) -> str:
     if not isinstance(s, str):
         return ""
-    s = ''.join(ch for ch in s if ch.isprintable())
+    if not s.isprintable():
+        s = s.translate(_NONPRINT_TABLE)
     return s.strip()
 
 def normalize_title(t: str) -> list[str]:
-    t = clean_text(t).lower()
-    t = re.sub(r"[^a-z0-9]+", " ", t)
-    return [tok for tok in t.split() if tok]
-
-def title_similarity(a: str, b: str) -> float:
-    ta = set(normalize_title(a))
-    tb = set(normalize_title(b))
-    if not ta or not tb:
+    return _NON_ALNUM_RE.sub(" ", clean_text(t).lower()).split()
+
+def title_key(t: str) -> str:
+    """
+    Normalized title used to spot repeated Crossref title searches:
+    casefolded Unicode word tokens, so 'Född' and 'Fådd' stay distinct.
+    Titles without any word characters fall back to their cleaned text.
+    """
+    cleaned = clean_text(t).casefold()
+    return " ".join(_WORD_RE.findall(cleaned)) or cleaned
+
+def title_similarity(diva_tokens: frozenset[str], cand_title: str) -> float:
+    """
+    Jaccard similarity between the (precomputed) DiVA title tokens
+    and the tokens of a Crossref candidate title.
+    """
+    tb = frozenset(normalize_title(cand_title))
+    if not diva_tokens or not tb:
         return 0.0
-    inter = len(ta & tb)
-    union = len(ta | tb)
+    inter = len(diva_tokens & tb)
+    union = len(diva_tokens) + len(tb) - inter
     return inter / union
 
 def normalize_page(page_str: str) -> str:
@@ -171,6 +346,15 @@ def crossref_type_category(cr_type: str | None) -> str | None:
         return "article"
     return None
 
+# Crossref work types to ask for per DiVA category (used as a `type:` filter,
+# so the CROSSREF_ROWS_PER_QUERY budget is spent on same-kind candidates)
+DIVA_TO_CROSSREF_TYPES = {
+    "article": ("journal-article", "peer-review"),
+    "conference": ("proceedings-article",),
+    "book": ("book", "monograph", "edited-book", "reference-book"),
+    "chapter": ("book-chapter", "book-part", "book-section", "reference-entry"),
+}
+
 # ---- Author helpers ----
 
 def extract_diva_author_names(raw: str) -> list[str]:
@@ -181,42 +365,29 @@ def extract_diva_author_names(raw: str) -> list[str]:
     """
     if not raw:
         return []
-
-    authors = []
-    for part in raw.split(";"):
-        part = part.strip()
-        if not part:
-            continue
-        # Cut off affiliation part: everything from first ' (' onwards
-        part = re.split(r"\s\(", part, maxsplit=1)[0]
-        # Remove [u1lv4ls8]-style ids
-        part = re.sub(r"\[[^\]]*\]", "", part).strip()
-        part = re.sub(r"\s+", " ", part)
-        if part:
-            authors.append(part)
-    return authors
+    return [_WS_RE.sub(" ", m) for m in _AUTHOR_RE.findall(raw) if m]
 
 def extract_diva_authors(row) -> set[str]:
     """
     Return set of family names from DiVA Name column,
     assuming 'Family, Given' format.
     """
-    raw = (row.get("Name", "") or "").strip()
+    raw = row.get("Name", "") or ""
     names = extract_diva_author_names(raw)
     surnames = set()
     for n in names:
-        fam = n.split(",", 1)[0].strip().lower()
+        fam = n.split(",", 1)[0].strip().casefold()
         if fam:
-            surnames.add(fam)
+            surnames.add(sys.intern(fam))
     return surnames
 
 def extract_crossref_authors(metadata: dict) -> set[str]:
     authors = metadata.get("author") or []
     names = set()
     for a in authors:
-        fam = (a.get("family") or "").strip().lower()
+        fam = (a.get("family") or "").strip().casefold()
         if fam:
-            names.add(fam)
+            names.add(sys.intern(fam))
     return names
 
 def authors_match(diva_row, metadata: dict) -> bool:
@@ -224,31 +395,20 @@ def authors_match(diva_row, metadata: dict) -> bool:
     cr_auth = extract_crossref_authors(metadata)
 
     if not diva_auth or not cr_auth:
-        print("        ⚠ Missing authors on one side; skipping author check")
+        log.debug("        ⚠ Missing authors on one side; skipping author check")
         return False
 
+    if not log.isEnabledFor(logging.DEBUG):
+        return not diva_auth.isdisjoint(cr_auth)
+
     inter = diva_auth & cr_auth
-    print(f"        DiVA authors: {sorted(diva_auth)}")
-    print(f"        Crossref authors: {sorted(cr_auth)}")
-    print(f"        Author intersection: {sorted(inter)}")
+    log.debug("        DiVA authors: %s", sorted(diva_auth))
+    log.debug("        Crossref authors: %s", sorted(cr_auth))
+    log.debug("        Author intersection: %s", sorted(inter))
     return bool(inter)
 
 # ---- Crossref detail helpers ----
 
-def get_crossref_full_metadata(doi: str):
-    url = f"https://api.crossref.org/works/{doi}"
-    params = {}
-    if MAILTO:
-        params["mailto"] = MAILTO
-    try:
-        r = requests.get(url, params=params, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-        return data.get("message", {})
-    except Exception as e:
-        print(f"      ERROR fetching full metadata for {doi}: {e}")
-        return {}
-
 def extract_crossref_biblio(metadata: dict) -> dict:
     volume = metadata.get("volume", "") or ""
     issue = metadata.get("issue", "") or ""
@@ -270,7 +430,7 @@ def extract_crossref_biblio(metadata: dict) -> dict:
         if article_num:
             start_page = article_num.strip()
 
-    issn_list = metadata.get("ISSN", []) or []
+    issn_list = list(metadata.get("ISSN", []) or [])
     ji = metadata.get("journal-issue") or {}
     issue_issn = ji.get("ISSN")
     if issue_issn:
@@ -294,64 +454,87 @@ def issn_match(diva_row, crossref_biblio: dict) -> bool:
     cr_issns = crossref_biblio.get("issns", set()) or set()
 
     if not diva_issns or not cr_issns:
-        print("        ⚠ Missing ISSN on one side; cannot ISSN-match")
+        log.debug("        ⚠ Missing ISSN on one side; cannot ISSN-match")
         return False
 
+    if not log.isEnabledFor(logging.DEBUG):
+        return not diva_issns.isdisjoint(cr_issns)
+
     inter = diva_issns & cr_issns
-    print(f"        DiVA ISSNs: {sorted(diva_issns)}")
-    print(f"        Crossref ISSNs: {sorted(cr_issns)}")
-    print(f"        ISSN intersection: {sorted(inter)}")
+    log.debug("        DiVA ISSNs: %s", sorted(diva_issns))
+    log.debug("        Crossref ISSNs: %s", sorted(cr_issns))
+    log.debug("        ISSN intersection: %s", sorted(inter))
     return bool(inter)
 
+# Fields compared by bibliographic_match, fixed by the VERIFY_USE_* flags:
+# (DiVA column, key in extract_crossref_biblio's result)
+_BIB_CHECKS = (
+    ([("Volume", "volume")] if VERIFY_USE_VOLUME else [])
+    + ([("Issue", "issue")] if VERIFY_USE_ISSUE else [])
+    + ([("StartPage", "start_page"), ("EndPage", "end_page")] if VERIFY_USE_PAGES else [])
+)
+
 def bibliographic_match(diva_row, crossref_biblio: dict) -> bool:
-    diva_volume = normalize_page(diva_row.get("Volume", ""))
-    diva_issue = normalize_page(diva_row.get("Issue", ""))
-    diva_start = normalize_page(diva_row.get("StartPage", ""))
-    diva_end = normalize_page(diva_row.get("EndPage", ""))
-
-    cr_volume = crossref_biblio.get("volume", "")
-    cr_issue = crossref_biblio.get("issue", "")
-    cr_start = crossref_biblio.get("start_page", "")
-    cr_end = crossref_biblio.get("end_page", "")
-
-    checks = []
-
-    if VERIFY_USE_VOLUME and diva_volume and cr_volume:
-        checks.append(("Volume", diva_volume == cr_volume, diva_volume, cr_volume))
-    if VERIFY_USE_ISSUE and diva_issue and cr_issue:
-        checks.append(("Issue", diva_issue == cr_issue, diva_issue, cr_issue))
-    if VERIFY_USE_PAGES and diva_start and cr_start:
-        checks.append(("StartPage", diva_start == cr_start, diva_start, cr_start))
-    if VERIFY_USE_PAGES and diva_end and cr_end:
-        checks.append(("EndPage", diva_end == cr_end, diva_end, cr_end))
-
-    for field, matches, diva_val, cr_val in checks:
-        status = "✓" if matches else "✗"
-        print(f"        {status} {field}: DiVA='{diva_val}' vs Crossref='{cr_val}'")
-
-    active_checks = [c for c in checks]
-    if not active_checks:
-        print("        ⚠ No bibliographic fields (with flags ON) to compare")
-        return False
+    """
+    True if every field present on both sides agrees, and at least one
+    field could be compared. Stops at the first mismatch.
+    """
+    compared = False
+    for field, cr_key in _BIB_CHECKS:
+        diva_val = normalize_page(diva_row.get(field, ""))
+        cr_val = crossref_biblio.get(cr_key, "")
+        if not diva_val or not cr_val:
+            continue
+        compared = True
+        if diva_val != cr_val:
+            log.debug("        ✗ %s: DiVA='%s' vs Crossref='%s'", field, diva_val, cr_val)
+            return False
+        log.debug("        ✓ %s: DiVA='%s' vs Crossref='%s'", field, diva_val, cr_val)
 
-    return all(check[1] for check in active_checks)
+    if not compared:
+        log.debug("        ⚠ No bibliographic fields (with flags ON) to compare")
+    return compared
 
 # ---- Crossref search (with type) ----
 
-def search_crossref_title(title: str, year: int | None = None, max_results: int = 5):
+# Besides what we match on, ask for everything the verification checks read,
+# so candidates are verified straight from the search hit (a field missing
+# here is missing from /works/{doi} too)
+CROSSREF_SEARCH_SELECT = "DOI,title,issued,type,volume,issue,page,article-number,ISSN,author"
+
+def search_crossref_title(
+    title: str,
+    year: int | None = None,
+    max_results: int = 5,
+    diva_cat: str | None = None,
+):
+    """
+    Return (doi, title, year, type, item) per Crossref hit, where item is the
+    raw search result with the CROSSREF_SEARCH_SELECT fields.
+    With diva_cat, only Crossref types matching that DiVA category are returned.
+    """
+    # Titles differing only in case/punctuation share one entry
+    cache_key = (
+        f"search:{title_key(title)}|{year}|{diva_cat}|{max_results}"
+        f"|{CROSSREF_SEARCH_SELECT}"
+    )
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     params = {
         "query.title": clean_text(title),
         "rows": max_results,
-        "select": "DOI,title,issued,type",
+        "select": CROSSREF_SEARCH_SELECT,
     }
-    if MAILTO:
-        params["mailto"] = MAILTO
+    filters = []
     if year:
-        params["filter"] = f"from-pub-date:{year}-01-01,until-pub-date:{year}-12-31"
+        filters.append(f"from-pub-date:{year}-01-01,until-pub-date:{year}-12-31")
+    filters.extend(f"type:{t}" for t in DIVA_TO_CROSSREF_TYPES.get(diva_cat, ()))
+    if filters:
+        params["filter"] = ",".join(filters)
 
-    r = requests.get("https://api.crossref.org/works", params=params, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = crossref_get("https://api.crossref.org/works", params)
     items = data.get("message", {}).get("items", [])
     results = []
     for it in items:
@@ -368,7 +551,8 @@ def search_crossref_title(title: str, year: int | None = None, max_results: int
             cand_year = None
         cr_type = it.get("type")
         if doi:
-            results.append((doi, cand_title, cand_year, cr_type))
+            results.append((doi, cand_title, cand_year, cr_type, it))
+    cache_put(cache_key, results)
     return results
 
 # ---- Web of Science helper ----
@@ -393,6 +577,7 @@ def lookup_wos_uid_by_doi(doi: str) -> str:
         "X-ApiKey": WOS_API_KEY,
     }
     try:
+        WOS_LIMITER.wait()
         r = requests.get(WOS_BASE_URL, headers=headers, params=params, timeout=20)
         r.raise_for_status()
         data = r.json()
@@ -404,10 +589,10 @@ def lookup_wos_uid_by_doi(doi: str) -> str:
                 uid = raw_uid
                 if uid.upper().startswith("WOS:"):
                     uid = uid.split(":", 1)[1]
-                print(f"      WoS UID for DOI {doi}: {raw_uid} -> stored as {uid}")
+                log.debug("      WoS UID for DOI %s: %s -> stored as %s", doi, raw_uid, uid)
                 return uid
     except Exception as e:
-        print(f"      ERROR looking up WoS UID for DOI {doi}: {e}")
+        log.warning("      ERROR looking up WoS UID for DOI %s: %s", doi, e)
     return ""
 
 # ---- Scopus helper ----
@@ -429,6 +614,7 @@ def lookup_scopus_eid_by_doi(doi: str) -> str:
         "X-ELS-APIKey": SCOPUS_API_KEY,
     }
     try:
+        SCOPUS_LIMITER.wait()
         r = requests.get(SCOPUS_BASE_URL, headers=headers, params=params, timeout=20)
         r.raise_for_status()
         data = r.json()
@@ -436,10 +622,10 @@ def lookup_scopus_eid_by_doi(doi: str) -> str:
         if entries:
             eid = entries[0].get("eid") or ""
             if eid:
-                print(f"      Scopus EID for DOI {doi}: {eid}")
+                log.debug("      Scopus EID for DOI %s: %s", doi, eid)
                 return eid
     except Exception as e:
-        print(f"      ERROR looking up Scopus EID for DOI {doi}: {e}")
+        log.warning("      ERROR looking up Scopus EID for DOI %s: %s", doi, e)
     return ""
 
 # ---- PubMed helper ----
@@ -461,16 +647,17 @@ def lookup_pmid_by_doi(doi: str) -> str:
         "email": NCBI_EMAIL,
     }
     try:
+        PUBMED_LIMITER.wait()
         r = requests.get(base, params=params, timeout=20)
         r.raise_for_status()
         data = r.json()
         idlist = (data.get("esearchresult") or {}).get("idlist") or []
         if idlist:
             pmid = idlist[0]
-            print(f"      PubMed ID for DOI {doi}: {pmid}")
+            log.debug("      PubMed ID for DOI %s: %s", doi, pmid)
             return pmid
     except Exception as e:
-        print(f"      ERROR looking up PMID for DOI {doi}: {e}")
+        log.warning("      ERROR looking up PMID for DOI %s: %s", doi, e)
     return ""
 
 # ---- Link builders ----
@@ -510,227 +697,304 @@ def make_pid_url(pid: str) -> str:
     encoded_pid = quote(pid_value, safe="")
     return f"https://{DIVA_PORTAL}.diva-portal.org/smash/record.jsf?pid={encoded_pid}"
 
-# -------------------- MAIN --------------------
+# ---- Row matching ----
 
-def main():
-    url = build_diva_url(FROM_YEAR, TO_YEAR)
-    download_diva_csv(url, DOWNLOADED_CSV)
+def row_search_key(row) -> tuple[str, int | None, str | None]:
+    """
+    (title_key, year, DiVA category) of a DiVA row. Rows sharing this key
+    get the same Crossref title search, so they are matched as one group.
+    """
+    try:
+        pub_year = int(row["Year"])
+    except ValueError:
+        pub_year = None
+    diva_cat = diva_pubtype_category(row.get("PublicationType", ""))
+    return title_key(row["Title"]), pub_year, diva_cat
 
-    df = pd.read_csv(DOWNLOADED_CSV, dtype=str).fillna("")
-    df["ISI"] = df["ISI"].astype(str).str.strip()
-    df["Title"] = df["Title"].apply(clean_text)
+def match_row(idx, row, candidates: list) -> tuple[str, str, dict]:
+    """
+    Check one DiVA row against its Crossref candidates.
+    Return (verified DOI, possible DOI, {column: id} from WoS/Scopus/PubMed),
+    with '' for a DOI that was not found.
+    """
+    pid = row["PID"]
+    scopus = row["ScopusId"]
+    isi = row["ISI"]
+    title = row["Title"]
+    diva_pubtype = row.get("PublicationType", "")
+    _, pub_year, diva_cat = row_search_key(row)
+
+    log.debug(
+        "\n[%s] PID=%s ScopusId=%s ISI=%s PubType=%s",
+        idx, pid, scopus, isi, diva_pubtype,
+    )
+    log.debug("  Title: '%s'", title)
+    log.debug("  Year: %s", pub_year)
+    log.debug(
+        "  DiVA biblio: Vol=%s Issue=%s Start=%s End=%s",
+        row.get("Volume", ""), row.get("Issue", ""),
+        row.get("StartPage", ""), row.get("EndPage", ""),
+    )
 
-    if "Possible DOI:s" not in df.columns:
-        df["Possible DOI:s"] = ""
-    if "Verified DOI" not in df.columns:
-        df["Verified DOI"] = ""
+    if not candidates or pub_year is None:
+        log.debug("  No candidates found or no valid year")
+        return "", "", {}
+
+    diva_tokens = frozenset(normalize_title(title))
+    best_verified_doi = None
+    best_verified_score = 0.0
+    best_possible_doi = None
+    best_possible_score = 0.0
+    best_year_verified = None
+    best_year_possible = None
+
+    # best title match first, so a verified hit lets us skip the rest
+    scored = sorted(
+        ((title_similarity(diva_tokens, c[1]), c) for c in candidates),
+        key=lambda sc: sc[0],
+        reverse=True,
+    )
 
-    cols = df.columns.tolist()
-    for col in ["Verified DOI", "Possible DOI:s"]:
-        if col in cols and "DOI" in cols:
-            cols.insert(cols.index("DOI") + 1, cols.pop(cols.index(col)))
-    df = df[cols]
+    for sim, (doi, cand_title, cand_year, cr_type, item) in scored:
+        log.debug("    cand: '%s' (Crossref year=%s, type=%s)", cand_title, cand_year, cr_type)
+        if cand_year != pub_year:
+            log.debug("      -> skip (year mismatch)")
+            continue
 
-    def to_int_or_none(s: str):
-        try:
-            return int(s.strip())
-        except Exception:
-            return None
+        # the search already filters on type; this only guards odd records
+        cr_cat = crossref_type_category(cr_type)
+        if diva_cat and cr_cat and cr_cat != diva_cat:
+            log.debug("      -> skip (type mismatch: DiVA=%s, Crossref=%s)", diva_cat, cr_cat)
+            continue
 
-    year_int = df["Year"].apply(to_int_or_none)
-    year_mask = year_int.between(FROM_YEAR, TO_YEAR, inclusive="both")
-    df = df[year_mask].copy()
-    print(f"After Year filter {FROM_YEAR}-{TO_YEAR}: {len(df)} rows")
+        log.debug("      DOI: %s", doi)
+        log.debug("      Title sim=%.3f", sim)
 
-    exclude_titles = {"foreword", "preface"}
-    df = df[~df["Title"].str.strip().str.lower().isin(exclude_titles)].copy()
-    print(f"After excluding Foreword/Preface: {len(df)} rows")
+        if sim < SIM_THRESHOLD:
+            log.debug("      -> skip (similarity %.3f < %s)", sim, SIM_THRESHOLD)
+            continue
 
-    has_doi = df["DOI"].str.strip() != ""
-    has_isi = df["ISI"].str.strip() != ""
-    has_scopus = df["ScopusId"].str.strip() != ""
+        if sim > best_possible_score:
+            best_possible_score = sim
+            best_possible_doi = doi
+            best_year_possible = cand_year
 
-    scopus_only_mask = (~has_doi) & (~has_isi) & has_scopus
-    isi_only_mask = (~has_doi) & has_isi & (~has_scopus)
-    no_id_mask = (~has_doi) & (~has_isi) & (~has_scopus)
+        if best_verified_doi and sim <= best_verified_score:
+            log.debug("      -> skip verification (not better than verified match)")
+            continue
 
-    if NO_ID_ONLY:
-        working_mask = no_id_mask
-    elif BOTH_TYPES:
-        working_mask = scopus_only_mask | isi_only_mask
-    else:
-        if SCOPUS_ONLY and not ISI_ONLY:
-            working_mask = scopus_only_mask
-        elif ISI_ONLY and not SCOPUS_ONLY:
-            working_mask = isi_only_mask
+        log.debug("      -> Title similarity OK, checking for VERIFICATION...")
+
+        crossref_biblio = extract_crossref_biblio(item)
+
+        issn_ok = True
+        biblio_ok = True
+        author_ok = True
+
+        if VERIFY_USE_ISSN:
+            issn_ok = issn_match(row, crossref_biblio)
+
+        if _BIB_CHECKS:
+            biblio_ok = bibliographic_match(row, crossref_biblio)
+
+        if VERIFY_USE_AUTHORS:
+            author_ok = authors_match(row, item)
+
+        if issn_ok and biblio_ok and (not VERIFY_USE_AUTHORS or author_ok):
+            log.debug("      ✓✓✓ VERIFIED match (all required checks passed)")
+            if sim > best_verified_score:
+                best_verified_score = sim
+                best_verified_doi = doi
+                best_year_verified = cand_year
         else:
-            raise ValueError(
-                "Invalid SCOPUS_ONLY / ISI_ONLY / BOTH_TYPES / NO_ID_ONLY combination"
-            )
+            log.debug("      ✗ Not all verification checks passed")
 
-    working_mask &= (df["Title"].str.strip() != "") & (df["Year"].str.strip() != "")
-    df_work = df[working_mask].copy()
-    print(f"Working rows: {len(df_work)}")
+    if best_verified_doi:
+        log.debug(
+            "  ✓✓✓ ACCEPT VERIFIED DOI=%s (sim=%.3f, year=%s)",
+            best_verified_doi, best_verified_score, best_year_verified,
+        )
+        ids = {}
 
-    accepted_count = 0
+        # Optional: look up Web of Science UID (ISI) when Verified DOI is found
+        if not isi and WOS_LOOKUP_FROM_VERIFIED_DOI:
+            wos_uid = lookup_wos_uid_by_doi(best_verified_doi)
+            if wos_uid:
+                ids["ISI"] = wos_uid
 
-    for idx in tqdm(df_work.index, desc="Querying Crossref"):
-        if accepted_count >= MAX_ACCEPTED:
-            print(f"\nReached MAX_ACCEPTED={MAX_ACCEPTED}, stopping early.")
-            break
+        # Optional: Scopus EID enrichment
+        if not scopus and SCOPUS_LOOKUP_FROM_VERIFIED_DOI:
+            eid = lookup_scopus_eid_by_doi(best_verified_doi)
+            if eid:
+                ids["ScopusId"] = eid
 
+        # Optional: PubMed PMID enrichment
+        if PUBMED_LOOKUP_FROM_VERIFIED_DOI and not row.get("PMID", ""):
+            pmid = lookup_pmid_by_doi(best_verified_doi)
+            if pmid:
+                ids["PMID"] = pmid
+
+        return best_verified_doi, "", ids
+
+    if best_possible_doi:
+        log.debug(
+            "  ✓ ACCEPT POSSIBLE DOI=%s (sim=%.3f, year=%s)",
+            best_possible_doi, best_possible_score, best_year_possible,
+        )
+        return "", best_possible_doi, {}
+
+    log.debug("  REJECT all candidates (no DOI passed the minimum checks)")
+    return "", "", {}
+
+def match_group(rows: list) -> list[tuple]:
+    """
+    Run one Crossref title search for (idx, row) pairs sharing a
+    row_search_key and match every row against its result.
+    Return (idx, verified DOI, possible DOI, ids) per matched row.
+    """
+    first = rows[0][1]
+    title = first["Title"]
+    _, pub_year, diva_cat = row_search_key(first)
+
+    log.debug("\n-> querying Crossref for '%s' (%s DiVA rows)", title, len(rows))
+    try:
+        candidates = search_crossref_title(
+            title,
+            pub_year,
+            max_results=CROSSREF_ROWS_PER_QUERY,
+            diva_cat=diva_cat,
+        )
+    except Exception as e:
+        log.warning("ERROR querying Crossref for '%s': %s", title, e)
+        return []
+
+    results = []
+    for idx, row in rows:
         try:
-            row = df_work.loc[idx]
-            pid = row["PID"].strip()
-            scopus = row["ScopusId"].strip()
-            isi = row["ISI"].strip()
-            title = row["Title"].strip()
-            year_str = row["Year"].strip()
-            diva_pubtype = row.get("PublicationType", "").strip()
-            diva_cat = diva_pubtype_category(diva_pubtype)
-
-            try:
-                pub_year = int(year_str)
-            except Exception:
-                pub_year = None
-
-            print(f"\n[{idx}] PID={pid} ScopusId={scopus} ISI={isi} PubType={diva_pubtype}")
-            print(f"  Title: '{title}'")
-            print(f"  Year: {pub_year}")
-            print(
-                f"  DiVA biblio: Vol={row.get('Volume','')} "
-                f"Issue={row.get('Issue','')} "
-                f"Start={row.get('StartPage','')} End={row.get('EndPage','')}"
+            results.append((idx, *match_row(idx, row, candidates)))
+        except Exception as e:
+            log.warning(
+                "[ERROR] Unexpected failure on index %s, PID=%s: %s",
+                idx, row.get("PID", "?"), e,
             )
-            print("  -> querying Crossref...")
-
-            try:
-                candidates = search_crossref_title(
-                    title, pub_year, max_results=CROSSREF_ROWS_PER_QUERY
-                )
-            except Exception as e:
-                print(f"  ERROR querying Crossref: {e}")
-                time.sleep(1.0)
-                continue
-
-            if not candidates or pub_year is None:
-                print("  No candidates found or no valid year")
-                time.sleep(1.0)
-                continue
+    return results
 
-            best_verified_doi = None
-            best_verified_score = 0.0
-            best_possible_doi = None
-            best_possible_score = 0.0
-            best_year_verified = None
-            best_year_possible = None
-
-            for doi, cand_title, cand_year, cr_type in candidates:
-                print(f"    cand: '{cand_title}' (Crossref year={cand_year}, type={cr_type})")
-                if cand_year != pub_year:
-                    print("      -> skip (year mismatch)")
-                    continue
+# -------------------- MAIN --------------------
 
-                cr_cat = crossref_type_category(cr_type)
-                if diva_cat and cr_cat and cr_cat != diva_cat:
-                    print(f"      -> skip (type mismatch: DiVA={diva_cat}, Crossref={cr_cat})")
-                    continue
+def setup_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.DEBUG if VERBOSE else logging.INFO)
+    log.propagate = False
 
-                sim = title_similarity(title, cand_title)
-                print(f"      DOI: {doi}")
-                print(f"      Title sim={sim:.3f}")
+def main():
+    setup_logging()
+    if diva_csv_is_fresh(DOWNLOADED_CSV):
+        log.info("Using cached DiVA CSV %s", DOWNLOADED_CSV)
+    else:
+        url = build_diva_url(FROM_YEAR, TO_YEAR)
+        download_diva_csv(url, DOWNLOADED_CSV)
 
-                if sim < SIM_THRESHOLD:
-                    print(f"      -> skip (similarity {sim:.3f} < {SIM_THRESHOLD})")
-                    continue
+    df = pd.read_csv(DOWNLOADED_CSV, dtype=str).fillna("")
+    # strip once here, so masks and matching can compare values directly
+    strip_cols = (
+        "PID", "DOI", "ISI", "ScopusId", "PMID", "Year", "Name", "PublicationType",
+        "JournalISSN", "JournalEISSN", "SeriesISSN", "SeriesEISSN",
+        "Volume", "Issue", "StartPage", "EndPage",
+    )
+    for c in strip_cols:
+        if c in df.columns:
+            df[c] = df[c].str.strip()
+    df["Title"] = df["Title"].apply(clean_text)
 
-                if sim > best_possible_score:
-                    best_possible_score = sim
-                    best_possible_doi = doi
-                    best_year_possible = cand_year
+    # whole-number years only, the same rule as int() in row_search_key
+    # (to_numeric alone would also accept e.g. "2025.0")
+    year_num = pd.to_numeric(df["Year"].where(df["Year"].str.fullmatch(r"\d+")), errors="coerce")
+    year_mask = year_num.between(FROM_YEAR, TO_YEAR, inclusive="both")
+    log.info("After Year filter %s-%s: %s rows", FROM_YEAR, TO_YEAR, int(year_mask.sum()))
 
-                print("      -> Title similarity OK, checking for VERIFICATION...")
+    exclude_titles = {"foreword", "preface"}
+    title_mask = ~df["Title"].str.casefold().isin(exclude_titles)
+    log.info("After excluding Foreword/Preface: %s rows", int((year_mask & title_mask).sum()))
 
-                full_metadata = get_crossref_full_metadata(doi)
-                if not full_metadata:
-                    print("      ⚠ Could not fetch full metadata, cannot verify")
-                    continue
+    has_doi = df["DOI"].ne("")
+    has_isi = df["ISI"].ne("")
+    has_scopus = df["ScopusId"].ne("")
 
-                crossref_biblio = extract_crossref_biblio(full_metadata)
+    scopus_only_mask = (~has_doi) & (~has_isi) & has_scopus
+    isi_only_mask = (~has_doi) & has_isi & (~has_scopus)
+    no_id_mask = (~has_doi) & (~has_isi) & (~has_scopus)
 
-                issn_ok = True
-                biblio_ok = True
-                author_ok = True
+    if NO_ID_ONLY:
+        id_mask = no_id_mask
+    elif BOTH_TYPES:
+        id_mask = scopus_only_mask | isi_only_mask
+    else:
+        if SCOPUS_ONLY and not ISI_ONLY:
+            id_mask = scopus_only_mask
+        elif ISI_ONLY and not SCOPUS_ONLY:
+            id_mask = isi_only_mask
+        else:
+            raise ValueError(
+                "Invalid SCOPUS_ONLY / ISI_ONLY / BOTH_TYPES / NO_ID_ONLY combination"
+            )
 
-                if VERIFY_USE_ISSN:
-                    issn_ok = issn_match(row, crossref_biblio)
+    working_mask = year_mask & title_mask & id_mask & df["Title"].ne("")
+    df_work = df.loc[working_mask].copy()
+    log.info("Working rows: %s", len(df_work))
 
-                if VERIFY_USE_VOLUME or VERIFY_USE_ISSUE or VERIFY_USE_PAGES:
-                    biblio_ok = bibliographic_match(row, crossref_biblio)
+    if USE_CROSSREF_CACHE:
+        open_crossref_cache()
 
-                if VERIFY_USE_AUTHORS:
-                    author_ok = authors_match(row, full_metadata)
+    # Rows with the same title, year and type share one Crossref search
+    groups = {}
+    for idx, row in df_work.iterrows():
+        groups.setdefault(row_search_key(row), []).append((idx, row))
 
-                if issn_ok and biblio_ok and (not VERIFY_USE_AUTHORS or author_ok):
-                    print("      ✓✓✓ VERIFIED match (all required checks passed)")
-                    if sim > best_verified_score:
-                        best_verified_score = sim
-                        best_verified_doi = doi
-                        best_year_verified = cand_year
+    accepted_count = 0
+    # results per df_work index, written back to df_work after the loop
+    verified = {}
+    possible = {}
+    enriched = {"ISI": {}, "ScopusId": {}, "PMID": {}}
+
+    # logging_redirect_tqdm: log lines are printed above the progress bar, not through it
+    with logging_redirect_tqdm(loggers=[log]), \
+            ThreadPoolExecutor(max_workers=CROSSREF_CONCURRENCY) as executor:
+        futures = [executor.submit(match_group, rows) for rows in groups.values()]
+        progress = tqdm(as_completed(futures), total=len(futures), desc="Querying Crossref")
+        for future in progress:
+            for idx, verified_doi, possible_doi, ids in future.result():
+                if accepted_count >= MAX_ACCEPTED:
+                    break
+                if verified_doi:
+                    verified[idx] = verified_doi
+                    for col, value in ids.items():
+                        enriched[col][idx] = value
+                elif possible_doi:
+                    possible[idx] = possible_doi
                 else:
-                    print("      ✗ Not all verification checks passed")
-
-            if best_verified_doi:
-                df_work.at[idx, "Verified DOI"] = best_verified_doi
-                df_work.at[idx, "Possible DOI:s"] = ""
-                accepted_count += 1
-                print(
-                    f"  ✓✓✓ ACCEPT VERIFIED DOI={best_verified_doi} "
-                    f"(sim={best_verified_score:.3f}, year={best_year_verified})"
-                )
-
-                # Optional: look up Web of Science UID (ISI) when Verified DOI is found
-                if not isi and WOS_LOOKUP_FROM_VERIFIED_DOI:
-                    wos_uid = lookup_wos_uid_by_doi(best_verified_doi)
-                    if wos_uid:
-                        df_work.at[idx, "ISI"] = wos_uid
-
-                # Optional: Scopus EID enrichment
-                if not scopus and SCOPUS_LOOKUP_FROM_VERIFIED_DOI:
-                    eid = lookup_scopus_eid_by_doi(best_verified_doi)
-                    if eid:
-                        df_work.at[idx, "ScopusId"] = eid
-
-                # Optional: PubMed PMID enrichment
-                if PUBMED_LOOKUP_FROM_VERIFIED_DOI and not row.get("PMID", "").strip():
-                    pmid = lookup_pmid_by_doi(best_verified_doi)
-                    if pmid:
-                        df_work.at[idx, "PMID"] = pmid
-
-            elif best_possible_doi:
-                df_work.at[idx, "Possible DOI:s"] = best_possible_doi
-                df_work.at[idx, "Verified DOI"] = ""
+                    continue
                 accepted_count += 1
-                print(
-                    f"  ✓ ACCEPT POSSIBLE DOI={best_possible_doi} "
-                    f"(sim={best_possible_score:.3f}, year={best_year_possible})"
-                )
-            else:
-                print("  REJECT all candidates (no DOI passed the minimum checks)")
+            log.debug("  -> accepted so far: %s/%s", accepted_count, MAX_ACCEPTED)
 
-            print(f"  -> accepted so far: {accepted_count}/{MAX_ACCEPTED}")
-            time.sleep(1.0)
+            if accepted_count >= MAX_ACCEPTED:
+                log.info("Reached MAX_ACCEPTED=%s, stopping early.", MAX_ACCEPTED)
+                for f in futures:
+                    f.cancel()
+                break
 
-        except Exception as e:
-            print(f"\n[ERROR] Unexpected failure on index {idx}, PID={row.get('PID','?')}: {e}")
-            time.sleep(1.0)
-            continue
-
-    mask_has_candidate = (
-        df_work["Possible DOI:s"].str.strip() != ""
-    ) | (
-        df_work["Verified DOI"].str.strip() != ""
+    df_work["Verified DOI"] = pd.Series(verified, dtype=str).reindex(
+        df_work.index, fill_value=""
     )
+    df_work["Possible DOI:s"] = pd.Series(possible, dtype=str).reindex(
+        df_work.index, fill_value=""
+    )
+    for col, values in enriched.items():
+        if values:
+            df_work.loc[list(values), col] = list(values.values())
+
+    mask_has_candidate = df_work["Possible DOI:s"].ne("") | df_work["Verified DOI"].ne("")
     df_out = df_work[mask_has_candidate].copy()
 
     csv_col_order = [
@@ -767,8 +1031,8 @@ def main():
     df_out = df_out[csv_col_order]
 
     df_out.to_csv(OUTPUT_CSV, index=False)
-    print(f"\nAccepted {accepted_count} records.")
-    print(f"Wrote {len(df_out)} rows with candidates to {OUTPUT_CSV}")
+    log.info("Accepted %s records.", accepted_count)
+    log.info("Wrote %s rows with candidates to %s", len(df_out), OUTPUT_CSV)
 
     df_links = df_out.copy()
     df_links["PID_link"] = df_links["PID"].apply(make_pid_url)
@@ -815,31 +1079,35 @@ def main():
     excel_col_order.extend(remaining)
     df_links = df_links[excel_col_order]
 
-    with pd.ExcelWriter(EXCEL_OUT, engine="xlsxwriter") as writer:
+    link_labels = {
+        "PID_link": "PID",
+        "Possible_DOI_link": "Possible DOI",
+        "Verified_DOI_link": "Verified DOI",
+        "ISI_link": "ISI",
+        "Scopus_link": "Scopus",
+    }
+
+    # strings_to_urls=False: plain cells stay plain; links are written explicitly below
+    with pd.ExcelWriter(
+        EXCEL_OUT,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_urls": False}},
+    ) as writer:
         df_links.to_excel(writer, index=False, sheet_name="DOI candidates")
         ws = writer.sheets["DOI candidates"]
 
         header = list(df_links.columns)
         col_idx = {name: i for i, name in enumerate(header)}
 
-        for row_xl, df_idx in enumerate(df_links.index, start=1):
-            if df_links.at[df_idx, "PID_link"]:
-                ws.write_url(row_xl, col_idx["PID_link"],
-                             df_links.at[df_idx, "PID_link"], string="PID")
-            if df_links.at[df_idx, "Possible_DOI_link"]:
-                ws.write_url(row_xl, col_idx["Possible_DOI_link"],
-                             df_links.at[df_idx, "Possible_DOI_link"], string="Possible DOI")
-            if df_links.at[df_idx, "Verified_DOI_link"]:
-                ws.write_url(row_xl, col_idx["Verified_DOI_link"],
-                             df_links.at[df_idx, "Verified_DOI_link"], string="Verified DOI")
-            if "ISI_link" in col_idx and df_links.at[df_idx, "ISI_link"]:
-                ws.write_url(row_xl, col_idx["ISI_link"],
-                             df_links.at[df_idx, "ISI_link"], string="ISI")
-            if "Scopus_link" in col_idx and df_links.at[df_idx, "Scopus_link"]:
-                ws.write_url(row_xl, col_idx["Scopus_link"],
-                             df_links.at[df_idx, "Scopus_link"], string="Scopus")
-
-    print(f"Wrote Excel with links to {EXCEL_OUT}")
+        for colname, label in link_labels.items():
+            if colname not in col_idx:
+                continue
+            col_xl = col_idx[colname]
+            for row_xl, link in enumerate(df_links[colname].tolist(), start=1):
+                if link:
+                    ws.write_url(row_xl, col_xl, link, string=label)
+
+    log.info("Wrote Excel with links to %s", EXCEL_OUT)
 
 if __name__ == "__main__":
     main()